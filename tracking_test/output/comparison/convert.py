@@ -10,14 +10,22 @@ def convert_excel_to_csv(excel_path, csv_path):
         return
 
     try:
-        with pd.ExcelFile(excel_path) as xls:
-            df_all = pd.DataFrame()
-            for sheet_name in xls.sheet_names:
-                df = pd.read_excel(xls, sheet_name=sheet_name)
-                df['sheet_name'] = sheet_name  # Add a column to identify the sheet
-                df_all = pd.concat([df_all, df], ignore_index=True)
-        
-        df_all.to_csv(csv_path, index=False)
+        with pd.ExcelFile(excel_path, engine="openpyxl") as xls:
+            # Read only the header rows first so every sheet is written with the
+            # same columns, in the order a single concat of all sheets would give
+            headers = [pd.read_excel(xls, sheet_name=name, nrows=0).assign(sheet_name=name)
+                       for name in xls.sheet_names]
+            columns = pd.concat(headers).columns if headers else pd.Index([])
+
+            # Stream one sheet at a time so only the largest sheet is held in memory
+            for i, name in enumerate(xls.sheet_names):
+                df = pd.read_excel(xls, sheet_name=name)
+                df["sheet_name"] = name
+                df.reindex(columns=columns).to_csv(
+                    csv_path, mode="w" if i == 0 else "a", header=i == 0, index=False
+                )
+                del df
+
         print(f"Successfully converted {excel_path} to {csv_path}")
 
     except Exception as e:
@@ -6,7 +6,6 @@ Quick script to analyze tracker IDs in a video
 import argparse
 import sys
 from pathlib import Path
-import cv2
 import numpy as np
 from ultralytics import YOLO
 import supervision as sv
@@ -15,12 +14,14 @@ import supervision as sv
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from core.enhanced_tracker import EnhancedTracker
+from core.video_io import Pipeline, VideoSource, batched
 
 
 def main():
     parser = argparse.ArgumentParser(description="Analyze tracker IDs")
     parser.add_argument("--video", required=True, help="Path to input video")
     parser.add_argument("--confidence", type=float, default=0.3, help="Confidence threshold")
+    parser.add_argument("--batch", type=int, default=4, help="Frames per YOLO inference call")
 
     args = parser.parse_args()
 
@@ -33,12 +34,13 @@ def main():
         minimum_consecutive_frames=3,
         ghost_buffer_frames=150,
         ghost_iou_threshold=0.2,
-        ghost_distance_threshold=200.0
+        ghost_distance_threshold=200.0,
+        log_level="off"  # The tracking log is never exported here
     )
 
     # Video setup
-    video_info = sv.VideoInfo.from_video_path(args.video)
-    cap = cv2.VideoCapture(args.video)
+    source = VideoSource(args.video)
+    video_info = source.video_info
 
     print(f"Analyzing video: {args.video}")
     print(f"FPS: {video_info.fps}, Resolution: {video_info.width}x{video_info.height}")
@@ -46,45 +48,51 @@ def main():
     print()
 
     frame_count = 0
-    all_ids_seen = set()
+    seen_mask = np.zeros(1024, dtype=bool)  # seen_mask[id] is True once an ID has appeared; grown on demand
     max_simultaneous = 0
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame_count += 1
-
-        # Run YOLO detection
-        results = model(frame, verbose=False, device="cpu", conf=args.confidence)[0]
-        detections = sv.Detections.from_ultralytics(results)
-
-        # Filter for person class only
-        person_mask = detections.class_id == 0
-        detections = detections[person_mask]
-
-        # Apply NMS and tracking
-        detections = detections.with_nms(threshold=0.7)
-        detections = tracker.update_with_detections(detections)
-
-        # Filter out invalid IDs
-        valid_tracker_mask = detections.tracker_id != -1
-        detections = detections[valid_tracker_mask]
-
-        # Track IDs
-        if len(detections) > 0:
-            current_ids = set(detections.tracker_id)
-            all_ids_seen.update(current_ids)
-            max_simultaneous = max(max_simultaneous, len(current_ids))
-
-        # Progress
-        if frame_count % 50 == 0:
-            print(f"Frame {frame_count}/{video_info.total_frames} | "
-                  f"Total IDs: {len(all_ids_seen)} | "
-                  f"Ghosts: {tracker.get_ghost_count()}")
-
-    cap.release()
+    # Frames are decoded on the pipeline's reader thread, so the next batch is
+    # being read while the current one goes through detection and tracking
+    with Pipeline(enumerate(source, start=1), []) as frames:
+        for batch in batched(frames, args.batch):
+            # Run YOLO detection on the whole batch in one call
+            results_list = model([frame for _, frame in batch], verbose=False, device="cpu", conf=args.confidence)
+
+            for (frame_count, _), results in zip(batch, results_list):
+                detections = sv.Detections.from_ultralytics(results)
+
+                # Filter for person class only
+                person_mask = detections.class_id == 0
+                detections = detections[person_mask]
+
+                # Apply NMS and tracking
+                detections = detections.with_nms(threshold=0.7)
+                detections = tracker.update_with_detections(detections)
+
+                # Filter out invalid IDs
+                valid_tracker_mask = detections.tracker_id != -1
+                detections = detections[valid_tracker_mask]
+
+                # Track IDs (tracker IDs are unique within a frame)
+                if len(detections) > 0:
+                    ids = detections.tracker_id
+                    max_id = ids.max()
+                    if max_id >= len(seen_mask):
+                        grown = np.zeros(max(2 * len(seen_mask), max_id + 1), dtype=bool)
+                        grown[:len(seen_mask)] = seen_mask
+                        seen_mask = grown
+                    seen_mask[ids] = True
+                    max_simultaneous = max(max_simultaneous, ids.size)
+
+                # Progress
+                if frame_count % 50 == 0:
+                    print(f"Frame {frame_count}/{video_info.total_frames} | "
+                          f"Total IDs: {np.count_nonzero(seen_mask)} | "
+                          f"Ghosts: {tracker.get_ghost_count()}")
+
+    source.release()
+
+    all_ids_seen = np.flatnonzero(seen_mask)
 
     print()
     print("=" * 60)
@@ -93,7 +101,7 @@ def main():
     print(f"Total frames processed: {frame_count}")
     print(f"Total unique IDs created: {len(all_ids_seen)}")
     print(f"Max simultaneous people: {max_simultaneous}")
-    print(f"All IDs seen: {sorted(all_ids_seen)}")
+    print(f"All IDs seen: {all_ids_seen.tolist()}")
     print()
 
     if len(all_ids_seen) <= max_simultaneous * 2:
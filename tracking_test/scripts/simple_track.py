@@ -8,52 +8,92 @@ import sys
 from pathlib import Path
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import supervision as sv
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from core.enhanced_tracker import EnhancedTracker
+from core.inference import load_detector
+from core.video_io import FrameDisplay, FrameWriter, Pipeline, VideoSource, batched
 
 
-def main():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Simple person tracking")
     parser.add_argument("--video", required=True, help="Path to input video")
     parser.add_argument("--model", default="yolov8n.pt", help="YOLO model path")
     parser.add_argument("--device", default="cpu", choices=["cpu", "cuda"], help="Device for inference")
     parser.add_argument("--confidence", type=float, default=0.3, help="Confidence threshold")
     parser.add_argument("--iou", type=float, default=0.7, help="IoU threshold for NMS")
+    parser.add_argument("--batch", type=int, default=4, help="Frames per YOLO inference call")
+    parser.add_argument("--precision", default="fp32", choices=["fp32", "fp16", "int8"],
+                        help="Model precision; the model is exported on first use to TensorRT (CUDA) or OpenVINO/ONNX Runtime (CPU, if installed; int8 on CPU needs OpenVINO, else it runs at fp32)")
+    parser.add_argument("--infer-imgsz", type=int, default=640,
+                        help="Detector input size; frames are letterboxed to this for inference and annotated at full resolution (e.g. 480 or 416 for ~2x faster detection)")
+    parser.add_argument("--tracker", default="enhanced", choices=["enhanced", "bytetrack"],
+                        help="enhanced: ByteTrack plus a ghost buffer that restores IDs of people who briefly disappear; "
+                             "bytetrack: plain ByteTrack, cheaper per frame (no ghost matching) but lost people get new IDs")
     parser.add_argument("--output", help="Output video path (optional)")
+    parser.add_argument("--encoder", default=None, choices=["h264_nvenc", "hevc_nvenc", "libx264"],
+                        help="FFmpeg encoder for the output video via PyAV, e.g. h264_nvenc for GPU encoding (default: OpenCV mp4v)")
+    parser.add_argument("--sample-fps", type=float, default=None,
+                        help="Process only this many frames per second, skipping the rest without decoding (default: every frame)")
     parser.add_argument("--no-display", action="store_true", help="Disable video display")
 
-    args = parser.parse_args()
+    return parser.parse_args(argv)
+
 
+def run(args, model=None, tracker=None):
+    """
+    Track people in args.video.
+
+    Args:
+        args: Parsed arguments (see parse_args)
+        model: Detector to use instead of loading args.model; load_detector
+            caches models per process, so repeated runs reuse the weights either way
+        tracker: Tracker to use instead of a new one picked by args.tracker
+            (tracker state carries over between videos, so pass a fresh one per video)
+    """
     # Initialize model and tracker
-    model = YOLO(args.model)
-    # Use EnhancedTracker with ghost buffer to prevent ID reassignment
-    tracker = EnhancedTracker(
-        track_activation_threshold=0.25,   # Lower threshold for initial detection
-        lost_track_buffer=150,             # Keep lost tracks for 5 seconds at 30fps (more patient)
-        minimum_matching_threshold=0.8,    # HIGHER threshold = stricter matching (fewer new IDs)
-        minimum_consecutive_frames=3,      # Require 3 frames before assigning new ID (reduce noise)
-        ghost_buffer_frames=150,           # Keep ghost tracks for 5 seconds at 30fps
-        ghost_iou_threshold=0.2,           # LOWER = more lenient ghost matching
-        ghost_distance_threshold=200.0     # HIGHER = match people further away
-    )
-
-    # Video setup
-    video_info = sv.VideoInfo.from_video_path(args.video)
-    cap = cv2.VideoCapture(args.video)
+    if model is None:
+        model = load_detector(args.model, args.precision, batch=args.batch, imgsz=args.infer_imgsz, device=args.device)
+    if tracker is None:
+        if args.tracker == "bytetrack":
+            # Same ByteTrack settings as below, without the ghost buffer
+            tracker = sv.ByteTrack(
+                track_activation_threshold=0.25,
+                lost_track_buffer=150,
+                minimum_matching_threshold=0.8,
+                minimum_consecutive_frames=3
+            )
+        else:
+            # Use EnhancedTracker with ghost buffer to prevent ID reassignment
+            tracker = EnhancedTracker(
+                track_activation_threshold=0.25,   # Lower threshold for initial detection
+                lost_track_buffer=150,             # Keep lost tracks for 5 seconds at 30fps (more patient)
+                minimum_matching_threshold=0.8,    # HIGHER threshold = stricter matching (fewer new IDs)
+                minimum_consecutive_frames=3,      # Require 3 frames before assigning new ID (reduce noise)
+                ghost_buffer_frames=150,           # Keep ghost tracks for 5 seconds at 30fps
+                ghost_iou_threshold=0.2,           # LOWER = more lenient ghost matching
+                ghost_distance_threshold=200.0,    # HIGHER = match people further away
+                log_level="off"                    # The tracking log is never exported here
+            )
+
+    # Video setup (hardware decode/encode when running on CUDA)
+    source = VideoSource(args.video, device=args.device)
+    video_info = source.video_info
+    sample_stride = max(1, round(video_info.fps / args.sample_fps)) if args.sample_fps else 1
 
     # Video writer setup
     video_writer = None
     if args.output:
-        video_writer = cv2.VideoWriter(
+        video_writer = FrameWriter(
             args.output,
             cv2.VideoWriter_fourcc(*'mp4v'),
-            video_info.fps,
-            (video_info.width, video_info.height)
+            video_info.fps / sample_stride,
+            (video_info.width, video_info.height),
+            device=args.device,
+            encoder=args.encoder
         )
 
     # Annotators
@@ -64,73 +104,106 @@ def main():
     print(f"FPS: {video_info.fps}, Resolution: {video_info.width}x{video_info.height}")
     print(f"Total frames: {video_info.total_frames}")
 
-    frame_count = 0
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame_count += 1
-
-        # Run YOLO detection - filter for person class (class_id = 0)
-        results = model(frame, verbose=False, device=args.device, conf=args.confidence)[0]
-        detections = sv.Detections.from_ultralytics(results)
-
-        # Filter for person class only
-        person_mask = detections.class_id == 0
-        detections = detections[person_mask]
-
-        # Apply NMS and tracking
-        detections = detections.with_nms(threshold=args.iou)
-        detections = tracker.update_with_detections(detections)
-
-        # Filter out detections without valid tracker IDs
-        valid_tracker_mask = detections.tracker_id != -1
-        detections = detections[valid_tracker_mask]
-
-        # Annotate frame
-        annotated_frame = frame.copy()
-        annotated_frame = box_annotator.annotate(scene=annotated_frame, detections=detections)
-
-        # Add labels with tracker IDs and confidence scores
-        if len(detections) > 0:
-            labels = [
-                f"#{tracker_id} ({confidence:.2f})"
-                for tracker_id, confidence in zip(detections.tracker_id, detections.confidence)
-            ]
-            annotated_frame = label_annotator.annotate(
-                scene=annotated_frame,
-                detections=detections,
-                labels=labels
+    # Plain ByteTrack has no ghost buffer to report
+    has_ghosts = hasattr(tracker, "get_ghost_count")
+
+    def detect_and_track(frames):
+        """Pipeline stage: run detection and tracking (tracker state is updated in frame order)"""
+        for batch in batched(frames, args.batch):
+            # Run YOLO detection on the whole batch in one call (boxes come back
+            # in full-frame coordinates)
+            results_list = model(
+                [frame for _, frame in batch], imgsz=args.infer_imgsz, verbose=False,
+                device=args.device, conf=args.confidence
             )
 
-        # Add frame info with ghost tracking
-        ghost_count = tracker.get_ghost_count()
-        frame_text = f"Frame: {frame_count} | People: {len(detections)} | Ghosts: {ghost_count}"
-        cv2.putText(annotated_frame, frame_text, (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            for (frame_count, frame), results in zip(batch, results_list):
+                detections = sv.Detections.from_ultralytics(results)
+
+                # Filter for person class only
+                person_mask = detections.class_id == 0
+                detections = detections[person_mask]
+
+                if len(detections) == 0:
+                    # Empty frame: the tracker still has to age its lost tracks and
+                    # ghosts, but there is nothing to suppress or filter
+                    tracker.update_with_detections(detections)
+                    yield frame_count, frame, detections, tracker.get_ghost_count() if has_ghosts else None
+                    continue
+
+                # Apply NMS and tracking
+                detections = detections.with_nms(threshold=args.iou)
+                detections = tracker.update_with_detections(detections)
+
+                # Filter out detections without valid tracker IDs
+                valid_tracker_mask = detections.tracker_id != -1
+                detections = detections[valid_tracker_mask]
+
+                # Read the ghost count now, the tracker moves on while this frame is annotated
+                yield frame_count, frame, detections, tracker.get_ghost_count() if has_ghosts else None
+
+    def annotate(tracked_frames):
+        """Pipeline stage: draw boxes, labels and the frame info overlay"""
+        for frame_count, frame, detections, ghost_count in tracked_frames:
+            # Annotate frame in place (each decoded frame is its own buffer)
+            annotated_frame = frame
+
+            # Add boxes and labels with tracker IDs and confidence scores
+            if len(detections) > 0:
+                annotated_frame = box_annotator.annotate(scene=annotated_frame, detections=detections)
+                labels = [
+                    f"#{tracker_id} ({confidence:.2f})"
+                    for tracker_id, confidence in zip(detections.tracker_id, detections.confidence)
+                ]
+                annotated_frame = label_annotator.annotate(
+                    scene=annotated_frame,
+                    detections=detections,
+                    labels=labels
+                )
+
+            # Add frame info with ghost tracking
+            frame_text = f"Frame: {frame_count} | People: {len(detections)}"
+            if ghost_count is not None:
+                frame_text += f" | Ghosts: {ghost_count}"
+            cv2.putText(annotated_frame, frame_text, (10, 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+            yield frame_count, annotated_frame
+
+    frame_count = 0
+
+    # Display runs on its own thread so imshow/waitKey don't stall the main loop
+    display = None if args.no_display else FrameDisplay("Simple Tracking")
 
-        # Save frame and display
-        if video_writer:
-            video_writer.write(annotated_frame)
+    # Decode, detect+track and annotate run on their own threads, so annotating
+    # and encoding one frame overlaps with inference on the next;
+    # writing and display stay on the main thread
+    with Pipeline(source.sample(sample_stride), [detect_and_track, annotate]) as pipeline:
+        for frame_count, annotated_frame in pipeline:
+            # Save frame and display
+            if video_writer:
+                video_writer.write(annotated_frame)
 
-        if not args.no_display:
-            cv2.imshow("Simple Tracking", annotated_frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+            if display:
+                display.show(annotated_frame)
+                if display.quit_requested.is_set():
+                    break
 
     # Cleanup
-    cap.release()
+    source.release()
     if video_writer:
         video_writer.release()
-    if not args.no_display:
-        cv2.destroyAllWindows()
+    if display:
+        display.close()
 
     print(f"\nProcessing complete! Processed {frame_count} frames")
     if args.output:
         print(f"Output saved to: {args.output}")
 
 
+def main():
+    run(parse_args())
+
+
 if __name__ == "__main__":
     main()
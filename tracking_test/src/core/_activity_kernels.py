@@ -0,0 +1,343 @@
+"""
+Numeric kernels for the per-person, per-frame hot paths
+
+Compiled with Numba when available, with vectorized NumPy fallbacks.
+"""
+
+import math
+from typing import Tuple
+import numpy as np
+
+from ._numba import NUMBA_AVAILABLE, njit
+
+
+def pack_polygons(polygons) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pack polygons with different vertex counts into one padded array.
+
+    Returns:
+        (vertices, counts): (Z, V_max, 2) float32 vertices, zero-padded, and
+        (Z,) int32 number of real vertices per polygon
+    """
+    counts = np.array([len(polygon) for polygon in polygons], dtype=np.int32)
+    vertices = np.zeros((len(polygons), counts.max(initial=0), 2), dtype=np.float32)
+    for z, polygon in enumerate(polygons):
+        vertices[z, :counts[z]] = np.asarray(polygon, dtype=np.float32).reshape(-1, 2)
+    return vertices, counts
+
+
+@njit(cache=True, fastmath=True)
+def _points_in_polygons_jit(points: np.ndarray, vertices: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    n_points = points.shape[0]
+    n_polygons = vertices.shape[0]
+    inside = np.zeros((n_points, n_polygons), dtype=np.bool_)
+
+    for p in range(n_points):
+        x = points[p, 0]
+        y = points[p, 1]
+        for z in range(n_polygons):
+            n_verts = counts[z]
+            if n_verts < 3:
+                continue
+            result = False
+            j = n_verts - 1
+            for i in range(n_verts):
+                xi = vertices[z, i, 0]
+                yi = vertices[z, i, 1]
+                xj = vertices[z, j, 0]
+                yj = vertices[z, j, 1]
+                if (yi > y) != (yj > y):
+                    if x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+                        result = not result
+                j = i
+            inside[p, z] = result
+
+    return inside
+
+
+def points_in_polygons(points: np.ndarray, vertices: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Test many points against many polygons in one call.
+
+    Ray-cast point-in-polygon test for polygons packed with pack_polygons;
+    replaces one cv2.pointPolygonTest call per point and zone. Points lying
+    exactly on an edge may be reported on either side, and polygons with fewer
+    than 3 vertices contain no points.
+
+    Runs on the CPU on purpose: tracked boxes are already NumPy arrays, and
+    a frame with dozens of people and a handful of zones takes a few
+    microseconds, less than one host-device round trip.
+
+    Args:
+        points: (P, 2) array of x, y coordinates
+        vertices: (Z, V_max, 2) padded polygon vertices
+        counts: (Z,) number of real vertices per polygon
+
+    Returns:
+        (P, Z) boolean membership matrix
+    """
+    points = np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 2)
+
+    if len(points) == 0 or len(counts) == 0:
+        return np.zeros((len(points), len(counts)), dtype=bool)
+
+    if NUMBA_AVAILABLE:
+        return _points_in_polygons_jit(points, vertices, counts)
+
+    x = points[:, 0]
+    y = points[:, 1]
+    inside = np.zeros((len(points), len(counts)), dtype=bool)
+    for z, n_verts in enumerate(counts):
+        if n_verts < 3:
+            continue
+        polygon = vertices[z, :n_verts]
+        xj, yj = polygon[-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for xi, yi in polygon:
+                crosses = (yi > y) != (yj > y)
+                x_cross = (xj - xi) * (y - yi) / (yj - yi) + xi
+                inside[:, z] ^= crosses & (x < x_cross)
+                xj, yj = xi, yi
+    return inside
+
+
+@njit(cache=True)
+def _box_centers_in_raster_jit(xyxy: np.ndarray, zone_bits: np.ndarray, num_zones: int) -> np.ndarray:
+    height, width = zone_bits.shape[0], zone_bits.shape[1]
+    hits = np.zeros((num_zones, xyxy.shape[0]), dtype=np.bool_)
+
+    for d in range(xyxy.shape[0]):
+        x = np.rint((xyxy[d, 0] + xyxy[d, 2]) / 2)
+        y = np.rint((xyxy[d, 1] + xyxy[d, 3]) / 2)
+        if x < 0 or y < 0 or x >= width or y >= height:
+            continue
+        px, py = int(x), int(y)
+        for z in range(num_zones):
+            hits[z, d] = (zone_bits[py, px, z >> 3] >> (z & 7)) & 1
+
+    return hits
+
+
+def box_centers_in_raster(xyxy: np.ndarray, zone_bits: np.ndarray, num_zones: int) -> np.ndarray:
+    """
+    Look up every box center in a packed zone bit raster.
+
+    Centers are rounded to the nearest pixel; bit z of zone_bits[y, x] marks
+    zone z. Centers outside the raster are in no zone.
+
+    Args:
+        xyxy: (N, 4) boxes
+        zone_bits: (H, W, ceil(Z / 8)) uint8 raster, bits in little-endian order
+        num_zones: Number of zones Z packed into the raster
+
+    Returns:
+        (Z, N) boolean membership matrix
+    """
+    xyxy = np.ascontiguousarray(xyxy).reshape(-1, 4)
+
+    if NUMBA_AVAILABLE:
+        return _box_centers_in_raster_jit(xyxy, zone_bits, num_zones)
+
+    centers = np.rint((xyxy[:, :2] + xyxy[:, 2:]) / 2).astype(int)
+    x, y = centers[:, 0], centers[:, 1]
+    height, width = zone_bits.shape[:2]
+    in_bounds = (x >= 0) & (y >= 0) & (x < width) & (y < height)
+    bits = zone_bits[np.clip(y, 0, height - 1), np.clip(x, 0, width - 1)]
+    hits = np.unpackbits(bits, axis=1, count=num_zones, bitorder="little").astype(bool)
+    return (hits & in_bounds[:, None]).T
+
+
+@njit(cache=True)
+def _pairwise_iou_distance_jit(boxes_a: np.ndarray, boxes_b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    half = np.float32(0.5)
+    iou = np.zeros((boxes_a.shape[0], boxes_b.shape[0]), dtype=np.float32)
+    distance = np.empty((boxes_a.shape[0], boxes_b.shape[0]), dtype=np.float64)
+
+    for m in range(boxes_a.shape[0]):
+        ax1, ay1, ax2, ay2 = boxes_a[m, 0], boxes_a[m, 1], boxes_a[m, 2], boxes_a[m, 3]
+        area_a = (ax2 - ax1) * (ay2 - ay1)
+        acx, acy = (ax1 + ax2) * half, (ay1 + ay2) * half
+        for n in range(boxes_b.shape[0]):
+            bx1, by1, bx2, by2 = boxes_b[n, 0], boxes_b[n, 1], boxes_b[n, 2], boxes_b[n, 3]
+
+            inter_w = min(ax2, bx2) - max(ax1, bx1)
+            inter_h = min(ay2, by2) - max(ay1, by1)
+            if inter_w >= 0 and inter_h >= 0:
+                intersection = np.float32(inter_w * inter_h)
+                union = np.float32(np.float32(area_a + (bx2 - bx1) * (by2 - by1)) - intersection)
+                if union > 0:
+                    iou[m, n] = intersection / union
+
+            dx = np.float32((bx1 + bx2) * half - acx)
+            dy = np.float32((by1 + by2) * half - acy)
+            distance[m, n] = math.hypot(np.float64(dx), np.float64(dy))
+
+    return iou, distance
+
+
+def pairwise_iou_distance(boxes_a: np.ndarray, boxes_b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    IoU and center distance between every box in boxes_a and every box in boxes_b.
+
+    Used by ghost matching in place of one GhostTrack.calculate_iou and
+    calculate_distance call per pair; IoU is computed in float32 like those.
+
+    Args:
+        boxes_a: (M, 4) xyxy boxes
+        boxes_b: (N, 4) xyxy boxes
+
+    Returns:
+        (iou, distance), both (M, N)
+    """
+    boxes_a = np.ascontiguousarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.ascontiguousarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    if NUMBA_AVAILABLE:
+        return _pairwise_iou_distance_jit(boxes_a, boxes_b)
+
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+
+    # Intersection (negative width or height means no overlap)
+    inter_w = np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0])
+    inter_h = np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1])
+    intersection = inter_w * inter_h
+    union = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1]) + (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1]) - intersection
+
+    overlapping = (inter_w >= 0) & (inter_h >= 0) & (union > 0)
+    iou = np.where(overlapping, intersection / np.where(overlapping, union, 1), np.float32(0))
+
+    dx = (b[..., 0] + b[..., 2]) / 2 - (a[..., 0] + a[..., 2]) / 2
+    dy = (b[..., 1] + b[..., 3]) / 2 - (a[..., 1] + a[..., 3]) / 2
+    distance = np.hypot(dx.astype(np.float64), dy.astype(np.float64))
+
+    return iou, distance
+
+
+# Activity labels returned by classify_posture, indexed by its result code
+POSTURE_ACTIVITIES = ("reading", "sitting", "reading_standing", "standing", "walking")
+
+# COCO keypoint indices used by the posture rules
+_NOSE, _LEFT_SHOULDER, _RIGHT_SHOULDER, _LEFT_HIP, _LEFT_KNEE = 0, 5, 6, 11, 13
+
+
+@njit(cache=True)
+def _angle_at(keypoints: np.ndarray, a: int, b: int, c: int) -> float:
+    """Angle in degrees at keypoint b between a-b-c (180 if any coordinate is missing)"""
+    ax, ay = keypoints[a, 0], keypoints[a, 1]
+    bx, by = keypoints[b, 0], keypoints[b, 1]
+    cx, cy = keypoints[c, 0], keypoints[c, 1]
+    if ax == 0 or ay == 0 or bx == 0 or by == 0 or cx == 0 or cy == 0:
+        return 180.0
+
+    v1x, v1y = ax - bx, ay - by
+    v2x, v2y = cx - bx, cy - by
+    norms = np.sqrt(v1x * v1x + v1y * v1y) * np.sqrt(v2x * v2x + v2y * v2y)
+    cos_angle = (v1x * v2x + v1y * v2y) / (norms + 1e-6)
+    cos_angle = min(max(cos_angle, -1.0), 1.0)
+    return np.degrees(np.arccos(cos_angle))
+
+
+@njit(cache=True)
+def _head_tilt(keypoints: np.ndarray) -> float:
+    """Head tilt below the shoulders in degrees (0 if missing or head above shoulders)"""
+    for k in (_NOSE, _LEFT_SHOULDER, _RIGHT_SHOULDER):
+        if keypoints[k, 0] == 0 and keypoints[k, 1] == 0:
+            return 0.0
+
+    head_x = keypoints[_NOSE, 0] - (keypoints[_LEFT_SHOULDER, 0] + keypoints[_RIGHT_SHOULDER, 0]) / 2.0
+    head_y = keypoints[_NOSE, 1] - (keypoints[_LEFT_SHOULDER, 1] + keypoints[_RIGHT_SHOULDER, 1]) / 2.0
+    if head_y <= 0:
+        return 0.0
+
+    cos_angle = head_y / (np.sqrt(head_x * head_x + head_y * head_y) + 1e-6)
+    cos_angle = min(max(cos_angle, -1.0), 1.0)
+    return 90.0 - np.degrees(np.arccos(cos_angle))
+
+
+@njit(cache=True)
+def classify_posture(
+    keypoints: np.ndarray,
+    velocity: float,
+    standing_speed_threshold: float,
+    sitting_hip_angle_max: float,
+    reading_head_angle_min: float
+) -> int:
+    """
+    Posture rules of PoseTemporalDetector as one compiled function.
+
+    Only call this when NUMBA_AVAILABLE; without Numba the detector's NumPy
+    methods are faster than running this scalar code in the interpreter.
+
+    Args:
+        keypoints: (17, 2) keypoint coordinates, 0 where undetected
+        velocity: Smoothed hip velocity in px/sec
+
+    Returns:
+        Index into POSTURE_ACTIVITIES
+    """
+    head_tilt = _head_tilt(keypoints)
+
+    sitting = False
+    hip_missing = keypoints[_LEFT_HIP, 0] == 0 and keypoints[_LEFT_HIP, 1] == 0
+    knee_missing = keypoints[_LEFT_KNEE, 0] == 0 and keypoints[_LEFT_KNEE, 1] == 0
+    if not (hip_missing or knee_missing):
+        sitting = _angle_at(keypoints, _LEFT_SHOULDER, _LEFT_HIP, _LEFT_KNEE) < sitting_hip_angle_max
+
+    if sitting:
+        return 0 if head_tilt > reading_head_angle_min else 1
+    if velocity < standing_speed_threshold:
+        return 2 if head_tilt > reading_head_angle_min else 3
+    return 4
+
+
+@njit(cache=True)
+def _hip_velocity(ring: np.ndarray, count: int) -> float:
+    """Mean hip speed over the last 5 rows of one ring (see PoseTemporalDetector.calculate_velocity)"""
+    length = ring.shape[0]
+    total_speed = 0.0
+    steps = 0
+    prev = max(0, count - 5) % length
+    for i in range(max(0, count - 5) + 1, count):
+        cur = i % length
+        time_diff = ring[cur, 2] - ring[prev, 2]
+        has_hips = (ring[cur, 0] != 0 or ring[cur, 1] != 0) and (ring[prev, 0] != 0 or ring[prev, 1] != 0)
+        if time_diff > 0 and has_hips:
+            total_speed += math.hypot(ring[cur, 0] - ring[prev, 0], ring[cur, 1] - ring[prev, 1]) / time_diff
+            steps += 1
+        prev = cur
+    return total_speed / steps if steps else 0.0
+
+
+@njit(cache=True)
+def classify_postures(
+    hip_history: np.ndarray,
+    slots: np.ndarray,
+    counts: np.ndarray,
+    keypoints: np.ndarray,
+    standing_speed_threshold: float,
+    sitting_hip_angle_max: float,
+    reading_head_angle_min: float
+) -> np.ndarray:
+    """
+    Hip velocity and classify_posture for every person on a frame in one call.
+
+    Only call this when NUMBA_AVAILABLE, like classify_posture.
+
+    Args:
+        hip_history: (slots, history_length, 3) hip rings of PoseTemporalDetector
+        slots: (N,) ring slot of each person
+        counts: (N,) poses recorded so far for each person, including this frame's
+        keypoints: (N, 17, 2) keypoints of each person
+
+    Returns:
+        (N,) indices into POSTURE_ACTIVITIES
+    """
+    codes = np.empty(slots.shape[0], dtype=np.int64)
+    for p in range(slots.shape[0]):
+        velocity = _hip_velocity(hip_history[slots[p]], counts[p])
+        codes[p] = classify_posture(
+            keypoints[p], velocity, standing_speed_threshold,
+            sitting_hip_angle_max, reading_head_angle_min
+        )
+    return codes
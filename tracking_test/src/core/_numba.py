@@ -0,0 +1,22 @@
+"""
+Optional Numba support
+
+Kernels decorated with njit are compiled when Numba is installed and run as
+plain Python otherwise, so callers should check NUMBA_AVAILABLE and pick a
+vectorized NumPy path when it is False.
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
@@ -2,12 +2,17 @@
 Enhanced tracker with ghost buffer to prevent ID reassignment
 """
 
+import dataclasses
+import heapq
+import math
 import time
 from typing import Dict, Tuple, Optional, List
 import numpy as np
 import pandas as pd
 import supervision as sv
 
+from ._activity_kernels import pairwise_iou_distance
+
 
 class GhostTrack:
     """Represents a lost track that's kept in memory for potential re-matching"""
@@ -51,7 +56,7 @@ class GhostTrack:
         new_center = self._calculate_center(bbox)
         dx = new_center[0] - self.center[0]
         dy = new_center[1] - self.center[1]
-        return np.sqrt(dx*dx + dy*dy)
+        return math.hypot(dx, dy)
 
 
 class EnhancedTracker:
@@ -62,6 +67,29 @@ class EnhancedTracker:
     New detections in the same area are matched to ghost tracks instead of creating new IDs.
     """
 
+    # Columns of each tracking log event, in order. Events are kept as plain
+    # tuples of these values (frame and event first) rather than one dict per
+    # event, and only turned into records when the log is exported
+    LOG_FIELDS = {
+        'SUSPICIOUS_REASSIGNMENT_DETECTED': (
+            'frame', 'event', 'bytetrack_id', 'bbox_index', 'bbox_center_x', 'bbox_center_y',
+            'ghost_id_in_buffer', 'distance_to_ghost', 'iou_with_ghost',
+            'distance_threshold', 'iou_threshold', 'decision'
+        ),
+        'GHOST_MATCHING_ATTEMPT': (
+            'frame', 'event', 'bytetrack_id', 'bbox_index', 'bbox_center_x', 'bbox_center_y',
+            'was_suspicious', 'num_ghosts_compared', 'best_ghost_id', 'best_score', 'ghost_comparisons'
+        ),
+        'ID_RESTORED_FROM_GHOST': ('frame', 'event', 'bytetrack_id', 'restored_id', 'bbox_index', 'final_decision'),
+        'NEW_ID_ASSIGNED': ('frame', 'event', 'bytetrack_id', 'bbox_index', 'reason', 'final_decision'),
+        'ID_CONTINUED': ('frame', 'event', 'tracker_id', 'bbox_index', 'reason', 'final_decision'),
+    }
+
+    # What goes into the tracking log: nothing, the ID decisions (suspicious
+    # reassignments, restorations and new IDs), or also every matching attempt
+    # with its per-ghost comparisons and every continued ID
+    LOG_LEVELS = ("off", "decisions", "full")
+
     def __init__(
         self,
         track_activation_threshold: float = 0.4,
@@ -70,8 +98,12 @@ class EnhancedTracker:
         minimum_consecutive_frames: int = 1,
         ghost_buffer_frames: int = 90,  # Keep ghost for 3 seconds at 30fps
         ghost_iou_threshold: float = 0.3,  # IoU threshold for ghost matching
-        ghost_distance_threshold: float = 150.0  # Max distance for ghost matching (pixels)
+        ghost_distance_threshold: float = 150.0,  # Max distance for ghost matching (pixels)
+        log_level: str = "full"  # One of LOG_LEVELS; "off" when the log is never exported
     ):
+        if log_level not in self.LOG_LEVELS:
+            raise ValueError(f"Unknown log level '{log_level}', expected one of {self.LOG_LEVELS}")
+
         # Initialize ByteTrack with optimized settings
         self.base_tracker = sv.ByteTrack(
             track_activation_threshold=track_activation_threshold,
@@ -87,6 +119,13 @@ class EnhancedTracker:
 
         # Ghost tracking data
         self.ghost_tracks: Dict[int, GhostTrack] = {}  # tracker_id -> GhostTrack
+        # Ghost IDs and boxes as flat arrays in ghost_tracks order, for batched
+        # matching; rebuilt lazily after ghosts are added or removed (None = stale)
+        self._ghost_ids: List[int] = []
+        self._ghost_boxes: Optional[np.ndarray] = None
+        # (expiry frame, ghost ID) min-heap, so expiry only looks at ghosts that
+        # are due; entries for ghosts restored in the meantime are skipped
+        self._ghost_expiry: List[Tuple[int, int]] = []
         self.active_tracks: Dict[int, np.ndarray] = {}  # tracker_id -> bbox
         self.last_frame_active_ids: set = set()  # IDs that were active in the previous frame
         self.frame_count = 0
@@ -96,7 +135,16 @@ class EnhancedTracker:
         self.next_reassigned_id = 0
 
         # Logging for Excel export
-        self.tracking_log: List[Dict] = []  # Detailed log of all comparisons and decisions
+        self.log_level = log_level
+        self.tracking_log: List[tuple] = []  # Detailed log of all comparisons and decisions (rows of LOG_FIELDS)
+
+        # Output of the last two updates, used to extrapolate boxes on frames
+        # where detection is skipped (see predict_detections)
+        self.last_detections = sv.Detections.empty()
+        self.previous_detections = sv.Detections.empty()
+        self.update_gap = 1  # Frames between the previous and the last update
+        self.frames_since_update = 0
+        self._box_velocity: Optional[np.ndarray] = None
 
     def update_with_detections(self, detections: sv.Detections) -> sv.Detections:
         """
@@ -107,13 +155,20 @@ class EnhancedTracker:
         # First, run the base ByteTrack
         tracked_detections = self.base_tracker.update_with_detections(detections)
 
+        # Tracker IDs as Python ints, which hash and compare much faster than
+        # NumPy scalars in the set and dict lookups below
+        tracker_ids = []
+        if len(tracked_detections) > 0 and tracked_detections.tracker_id is not None:
+            tracker_ids = tracked_detections.tracker_id.tolist()
+        xyxy = tracked_detections.xyxy
+
         # Track current active IDs and their bboxes
         current_active_ids = set()
-        if len(tracked_detections) > 0 and tracked_detections.tracker_id is not None:
-            for i, tracker_id in enumerate(tracked_detections.tracker_id):
+        if tracker_ids:
+            for i, tracker_id in enumerate(tracker_ids):
                 if tracker_id != -1:
                     current_active_ids.add(tracker_id)
-                    self.active_tracks[tracker_id] = tracked_detections.xyxy[i]
+                    self.active_tracks[tracker_id] = xyxy[i]
 
         # Find tracks that were lost this frame (comparing to last frame's active IDs only)
         lost_ids = self.last_frame_active_ids - current_active_ids
@@ -126,34 +181,59 @@ class EnhancedTracker:
                     bbox=self.active_tracks[lost_id],
                     last_seen_frame=self.frame_count - 1
                 )
+                heapq.heappush(self._ghost_expiry, (self.frame_count - 1 + self.ghost_buffer_frames, lost_id))
+                self._ghost_boxes = None
                 # Reduced logging - only log new ghosts
 
         # Remove old ghosts that have expired
-        expired_ghosts = []
-        for ghost_id, ghost in self.ghost_tracks.items():
-            frames_since_lost = self.frame_count - ghost.last_seen_frame
-            if frames_since_lost > self.ghost_buffer_frames:
-                expired_ghosts.append(ghost_id)
-
-        for ghost_id in expired_ghosts:
-            del self.ghost_tracks[ghost_id]
-
-        # Build mapping of which bboxes have which IDs this frame
-        current_bbox_to_id = {}
-        if len(tracked_detections) > 0 and tracked_detections.tracker_id is not None:
-            for i, tracker_id in enumerate(tracked_detections.tracker_id):
-                if tracker_id != -1:
-                    current_bbox_to_id[i] = tracker_id
+        while self._ghost_expiry and self._ghost_expiry[0][0] < self.frame_count:
+            expiry_frame, ghost_id = heapq.heappop(self._ghost_expiry)
+            ghost = self.ghost_tracks.get(ghost_id)
+            # Skip entries for ghosts that were restored (and maybe lost again since)
+            if ghost is not None and ghost.last_seen_frame + self.ghost_buffer_frames == expiry_frame:
+                del self.ghost_tracks[ghost_id]
+                self._ghost_boxes = None
 
         # Try to match new detections with ghost tracks
-        if len(tracked_detections) > 0 and tracked_detections.tracker_id is not None:
-            new_tracker_ids = []
+        if tracker_ids:
+            new_tracker_ids = list(tracker_ids)  # Final IDs, only changed where a ghost is restored
             used_ghost_ids = set()  # Track which ghost IDs we've already used
-
-            for i, tracker_id in enumerate(tracked_detections.tracker_id):
-                bbox = tracked_detections.xyxy[i]
-                bbox_center = ((bbox[0] + bbox[2])/2, (bbox[1] + bbox[3])/2)
-
+            log_decisions = self.log_level != "off"
+            log_full = self.log_level == "full"
+
+            # Box centers for the log, computed for the whole frame at once
+            if log_decisions:
+                bbox_centers = ((xyxy[:, :2] + xyxy[:, 2:]) / 2).tolist()
+
+            # IoU and distance of every box against every ghost, computed once for
+            # the frame when any box will be compared (ghosts are only removed
+            # below, never added, so the values stay valid through the loop).
+            # No spatial index narrows the ghosts down first: the full matrix is
+            # one vectorized call, and every ghost's comparison goes into the log,
+            # far-away ones included
+            ghost_rows = {}
+            if self.ghost_tracks and any(
+                tracker_id in self.ghost_tracks or tracker_id not in self.last_frame_active_ids
+                for tracker_id in tracker_ids
+            ):
+                if self._ghost_boxes is None:
+                    self._ghost_ids = list(self.ghost_tracks)
+                    self._ghost_boxes = np.array([ghost.bbox for ghost in self.ghost_tracks.values()], dtype=np.float32)
+                ghost_rows = {ghost_id: row for row, ghost_id in enumerate(self._ghost_ids)}
+                ghost_ious, ghost_distances = pairwise_iou_distance(self._ghost_boxes, xyxy)
+
+                # Matching score of every pair, 0 where IoU or distance rule it out.
+                # Scored in float64 like the Python floats it replaces; a restored
+                # ghost's row is zeroed so later boxes can't pick it
+                ious = ghost_ious.astype(np.float64)
+                distance_scores = np.maximum(0, 1 - (ghost_distances / self.ghost_distance_threshold))
+                ghost_matches = (ious >= self.ghost_iou_threshold) & (ghost_distances <= self.ghost_distance_threshold)
+                ghost_scores = np.where(ghost_matches, 0.6 * ious + 0.4 * distance_scores, 0.0)
+
+                ghost_ious = ghost_ious.tolist()
+                ghost_distances = ghost_distances.tolist()
+
+            for i, tracker_id in enumerate(tracker_ids):
                 # Check if ByteTrack assigned an ID that's suspicious:
                 # 1. ID exists in ghost buffer (was recently lost)
                 # 2. This bbox is far from where that ID should be
@@ -162,9 +242,9 @@ class EnhancedTracker:
                 suspicious_iou = None
 
                 if tracker_id in self.ghost_tracks:
-                    ghost = self.ghost_tracks[tracker_id]
-                    distance = ghost.calculate_distance(bbox)
-                    iou = ghost.calculate_iou(bbox)
+                    row = ghost_rows[tracker_id]
+                    distance = ghost_distances[row][i]
+                    iou = ghost_ious[row][i]
                     suspicious_distance = distance
                     suspicious_iou = iou
 
@@ -174,145 +254,126 @@ class EnhancedTracker:
                         suspicious_reassignment = True
 
                         # Log suspicious reassignment detection
-                        self.tracking_log.append({
-                            'frame': self.frame_count,
-                            'event': 'SUSPICIOUS_REASSIGNMENT_DETECTED',
-                            'bytetrack_id': int(tracker_id),
-                            'bbox_index': i,
-                            'bbox_center_x': float(bbox_center[0]),
-                            'bbox_center_y': float(bbox_center[1]),
-                            'ghost_id_in_buffer': int(tracker_id),
-                            'distance_to_ghost': float(distance),
-                            'iou_with_ghost': float(iou),
-                            'distance_threshold': float(self.ghost_distance_threshold),
-                            'iou_threshold': float(self.ghost_iou_threshold),
-                            'decision': 'REJECT - Will search for correct ghost match'
-                        })
+                        if log_decisions:
+                            self.tracking_log.append((
+                                self.frame_count, 'SUSPICIOUS_REASSIGNMENT_DETECTED', tracker_id, i,
+                                *bbox_centers[i], tracker_id, distance, iou,
+                                float(self.ghost_distance_threshold), float(self.ghost_iou_threshold),
+                                'REJECT - Will search for correct ghost match'
+                            ))
 
                 # Check if this is a TRULY new ID or suspicious reassignment
                 if (tracker_id != -1 and tracker_id not in self.last_frame_active_ids) or suspicious_reassignment:
-                    # Try to match with ghost tracks
+                    # Try to match with ghost tracks: the best score wins, ties
+                    # going to the oldest ghost
                     best_ghost_id = None
                     best_score = 0.0
-                    ghost_comparisons = []
-
-                    for ghost_id, ghost in self.ghost_tracks.items():
-                        # Skip if we already used this ghost for another bbox this frame
-                        if ghost_id in used_ghost_ids:
-                            ghost_comparisons.append({
-                                'ghost_id': int(ghost_id),
-                                'status': 'SKIPPED - Already used this frame',
-                                'iou': None,
-                                'distance': None,
-                                'score': None
-                            })
-                            continue
-
-                        # Calculate IoU and distance
-                        iou = ghost.calculate_iou(bbox)
-                        distance = ghost.calculate_distance(bbox)
-
-                        # Match if IoU is good AND distance is small
-                        match_criteria_met = iou >= self.ghost_iou_threshold and distance <= self.ghost_distance_threshold
-
-                        if match_criteria_met:
-                            # Combine IoU and distance for matching score
-                            # Normalize distance to 0-1 range (closer = higher score)
-                            distance_score = max(0, 1 - (distance / self.ghost_distance_threshold))
-                            score = 0.6 * iou + 0.4 * distance_score
-
-                            ghost_comparisons.append({
-                                'ghost_id': int(ghost_id),
-                                'status': 'MATCH_CRITERIA_MET',
-                                'iou': float(iou),
-                                'distance': float(distance),
-                                'distance_score': float(distance_score),
-                                'combined_score': float(score),
-                                'is_best': False  # Will update later
-                            })
-
-                            if score > best_score:
-                                best_score = score
-                                best_ghost_id = ghost_id
-                        else:
-                            ghost_comparisons.append({
-                                'ghost_id': int(ghost_id),
-                                'status': 'NO_MATCH - Criteria not met',
-                                'iou': float(iou),
-                                'distance': float(distance),
-                                'iou_threshold': float(self.ghost_iou_threshold),
-                                'distance_threshold': float(self.ghost_distance_threshold),
-                                'score': None
-                            })
-
-                    # Mark best match
-                    for comp in ghost_comparisons:
-                        if comp.get('ghost_id') == best_ghost_id:
-                            comp['is_best'] = True
-
-                    # Log the matching attempt
-                    self.tracking_log.append({
-                        'frame': self.frame_count,
-                        'event': 'GHOST_MATCHING_ATTEMPT',
-                        'bytetrack_id': int(tracker_id),
-                        'bbox_index': i,
-                        'bbox_center_x': float(bbox_center[0]),
-                        'bbox_center_y': float(bbox_center[1]),
-                        'was_suspicious': suspicious_reassignment,
-                        'num_ghosts_compared': len(ghost_comparisons),
-                        'best_ghost_id': int(best_ghost_id) if best_ghost_id else None,
-                        'best_score': float(best_score) if best_ghost_id else None,
-                        'ghost_comparisons': str(ghost_comparisons)  # Will be expanded in Excel
-                    })
+                    if ghost_rows:
+                        best_row = int(ghost_scores[:, i].argmax())
+                        if ghost_scores[best_row, i] > 0:
+                            best_ghost_id = self._ghost_ids[best_row]
+                            best_score = float(ghost_scores[best_row, i])
+
+                    # Log how this box compared against each ghost
+                    if log_full:
+                        ghost_comparisons = []
+                        for ghost_id in ghost_rows:
+                            # Restored to another box earlier this frame
+                            if ghost_id not in self.ghost_tracks:
+                                continue
+
+                            # Skip if we already used this ghost for another bbox this frame
+                            if ghost_id in used_ghost_ids:
+                                ghost_comparisons.append({
+                                    'ghost_id': int(ghost_id),
+                                    'status': 'SKIPPED - Already used this frame',
+                                    'iou': None,
+                                    'distance': None,
+                                    'score': None
+                                })
+                                continue
+
+                            # IoU and distance
+                            row = ghost_rows[ghost_id]
+                            iou = ghost_ious[row][i]
+                            distance = ghost_distances[row][i]
+
+                            # Match if IoU is good AND distance is small
+                            if ghost_matches[row, i]:
+                                ghost_comparisons.append({
+                                    'ghost_id': int(ghost_id),
+                                    'status': 'MATCH_CRITERIA_MET',
+                                    'iou': float(iou),
+                                    'distance': float(distance),
+                                    'distance_score': float(distance_scores[row, i]),
+                                    'combined_score': float(ghost_scores[row, i]),
+                                    'is_best': False  # Will update later
+                                })
+                            else:
+                                ghost_comparisons.append({
+                                    'ghost_id': int(ghost_id),
+                                    'status': 'NO_MATCH - Criteria not met',
+                                    'iou': float(iou),
+                                    'distance': float(distance),
+                                    'iou_threshold': float(self.ghost_iou_threshold),
+                                    'distance_threshold': float(self.ghost_distance_threshold),
+                                    'score': None
+                                })
+
+                        # Mark best match
+                        for comp in ghost_comparisons:
+                            if comp.get('ghost_id') == best_ghost_id:
+                                comp['is_best'] = True
+
+                        # Log the matching attempt
+                        # The comparisons are stringified for Excel at export time
+                        self.tracking_log.append((
+                            self.frame_count, 'GHOST_MATCHING_ATTEMPT', tracker_id, i,
+                            *bbox_centers[i], suspicious_reassignment, len(ghost_comparisons),
+                            best_ghost_id if best_ghost_id else None,
+                            best_score if best_ghost_id else None,
+                            ghost_comparisons
+                        ))
 
                     # If we found a matching ghost, use its ID
                     if best_ghost_id is not None:
-                        new_tracker_ids.append(best_ghost_id)
+                        new_tracker_ids[i] = best_ghost_id
                         used_ghost_ids.add(best_ghost_id)
 
                         # Log successful ghost restoration
-                        self.tracking_log.append({
-                            'frame': self.frame_count,
-                            'event': 'ID_RESTORED_FROM_GHOST',
-                            'bytetrack_id': int(tracker_id),
-                            'restored_id': int(best_ghost_id),
-                            'bbox_index': i,
-                            'final_decision': f'Changed ID {tracker_id} → {best_ghost_id}'
-                        })
+                        if log_decisions:
+                            self.tracking_log.append((
+                                self.frame_count, 'ID_RESTORED_FROM_GHOST', tracker_id, best_ghost_id, i,
+                                f'Changed ID {tracker_id} → {best_ghost_id}'
+                            ))
 
                         # Remove from ghost buffer since it's active again
                         if best_ghost_id in self.ghost_tracks:
                             del self.ghost_tracks[best_ghost_id]
+                            self._ghost_boxes = None
+                        ghost_scores[ghost_rows[best_ghost_id]] = 0.0
 
                         # Update active tracks with the reassigned ID
-                        self.active_tracks[best_ghost_id] = bbox
+                        self.active_tracks[best_ghost_id] = xyxy[i]
                     else:
                         # No ghost match, keep the new ID
-                        new_tracker_ids.append(tracker_id)
-
-                        self.tracking_log.append({
-                            'frame': self.frame_count,
-                            'event': 'NEW_ID_ASSIGNED',
-                            'bytetrack_id': int(tracker_id),
-                            'bbox_index': i,
-                            'reason': 'No matching ghost found',
-                            'final_decision': f'Keep new ID {tracker_id}'
-                        })
+                        if log_decisions:
+                            self.tracking_log.append((
+                                self.frame_count, 'NEW_ID_ASSIGNED', tracker_id, i,
+                                'No matching ghost found', f'Keep new ID {tracker_id}'
+                            ))
                 else:
                     # Keep existing ID (it was active last frame and in correct position)
-                    new_tracker_ids.append(tracker_id)
-
-                    self.tracking_log.append({
-                        'frame': self.frame_count,
-                        'event': 'ID_CONTINUED',
-                        'tracker_id': int(tracker_id),
-                        'bbox_index': i,
-                        'reason': 'ID was active in previous frame',
-                        'final_decision': f'Continue ID {tracker_id}'
-                    })
+                    if log_full:
+                        self.tracking_log.append((
+                            self.frame_count, 'ID_CONTINUED', tracker_id, i,
+                            'ID was active in previous frame', f'Continue ID {tracker_id}'
+                        ))
 
-            # Update the tracker IDs in detections
-            tracked_detections.tracker_id = np.array(new_tracker_ids, dtype=int)
+            # Update the tracker IDs in detections; on most frames no ghost was
+            # restored and ByteTrack's own ID array already holds the final IDs
+            if used_ghost_ids:
+                tracked_detections.tracker_id = np.array(new_tracker_ids, dtype=int)
 
             # Build the FINAL set of active IDs after ghost matching
             final_active_ids = set(new_tracker_ids)
@@ -328,8 +389,48 @@ class EnhancedTracker:
         # Update last_frame_active_ids for next iteration using FINAL IDs (after ghost matching)
         self.last_frame_active_ids = final_active_ids.copy()
 
+        self.previous_detections = self.last_detections
+        self.last_detections = tracked_detections
+        self.update_gap = self.frames_since_update + 1
+        self.frames_since_update = 0
+        self._box_velocity = None
+
         return tracked_detections
 
+    def predict_detections(self) -> sv.Detections:
+        """
+        Extrapolate the last tracked boxes one more frame without running an update.
+
+        Used on frames where detection is skipped: each box moves by its per-frame
+        displacement between the last two updates, and IDs stay as they were.
+        Tracker state (ByteTrack, ghost buffer, frame count) is left untouched, so
+        buffer lengths keep counting updates rather than frames.
+        """
+        self.frames_since_update += 1
+        last = self.last_detections
+        if len(last) == 0 or last.tracker_id is None:
+            return last
+
+        if self._box_velocity is None:
+            self._box_velocity = self._estimate_box_velocity()
+
+        return dataclasses.replace(last, xyxy=last.xyxy + self._box_velocity * self.frames_since_update)
+
+    def _estimate_box_velocity(self) -> np.ndarray:
+        """Per-frame xyxy displacement of each last tracked box (zero for new tracks)"""
+        last, previous = self.last_detections, self.previous_detections
+        velocity = np.zeros_like(last.xyxy)
+        if len(previous) == 0 or previous.tracker_id is None:
+            return velocity
+
+        previous_rows = {tracker_id: i for i, tracker_id in enumerate(previous.tracker_id.tolist())}
+        for i, tracker_id in enumerate(last.tracker_id.tolist()):
+            j = previous_rows.get(tracker_id)
+            if j is not None:
+                velocity[i] = (last.xyxy[i] - previous.xyxy[j]) / self.update_gap
+
+        return velocity
+
     def get_ghost_count(self) -> int:
         """Get the current number of ghost tracks"""
         return len(self.ghost_tracks)
@@ -341,11 +442,29 @@ class EnhancedTracker:
     def reset(self):
         """Reset the tracker state"""
         self.ghost_tracks.clear()
+        self._ghost_ids = []
+        self._ghost_boxes = None
+        self._ghost_expiry = []
         self.active_tracks.clear()
         self.last_frame_active_ids.clear()
         self.id_mapping.clear()
         self.frame_count = 0
         self.tracking_log.clear()
+        self.last_detections = sv.Detections.empty()
+        self.previous_detections = sv.Detections.empty()
+        self.update_gap = 1
+        self.frames_since_update = 0
+        self._box_velocity = None
+
+    def tracking_log_dataframe(self) -> pd.DataFrame:
+        """Tracking log as a DataFrame with one row per event (columns missing from an event are NaN)"""
+        records = []
+        for row in self.tracking_log:
+            record = dict(zip(self.LOG_FIELDS[row[1]], row))
+            if 'ghost_comparisons' in record:
+                record['ghost_comparisons'] = str(record['ghost_comparisons'])  # Will be expanded in Excel
+            records.append(record)
+        return pd.DataFrame(records)
 
     def export_tracking_log_to_excel(self, output_path: str):
         """
@@ -359,7 +478,7 @@ class EnhancedTracker:
             return
 
         # Convert log to DataFrame
-        df_main = pd.DataFrame(self.tracking_log)
+        df_main = self.tracking_log_dataframe()
 
         # Create Excel writer
         with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
@@ -401,7 +520,7 @@ class EnhancedTracker:
         if not self.tracking_log:
             return {}
 
-        df = pd.DataFrame(self.tracking_log)
+        df = self.tracking_log_dataframe()
 
         summary = {
             'total_events': len(df),
@@ -0,0 +1,223 @@
+"""
+Model loading and inference helpers
+"""
+
+import functools
+import importlib.util
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+
+
+PRECISIONS = ("fp32", "fp16", "int8")
+
+# Compiled CPU runtime for exported detectors, if one is installed (optional:
+# without either, CPU runs use PyTorch eager)
+if importlib.util.find_spec("openvino") is not None:
+    CPU_BACKEND = "openvino"
+elif importlib.util.find_spec("onnxruntime") is not None:
+    CPU_BACKEND = "onnx"
+else:
+    CPU_BACKEND = None
+
+
+@functools.lru_cache(maxsize=None)
+def load_detector(
+    weights: str,
+    precision: str = "fp32",
+    batch: int = 1,
+    imgsz: int = 640,
+    device: Optional[str] = None
+) -> YOLO:
+    """
+    Load a YOLO model at the requested precision.
+
+    On CUDA, fp32 uses the PyTorch weights, fp16 a TensorRT FP16 engine
+    (fused kernels on the tensor cores) and int8 a TensorRT engine exported
+    with INT8 calibration, which halves weight bandwidth again and runs on the
+    INT8 tensor cores.
+
+    On CPU the model is exported to OpenVINO (FP16-compressed weights for
+    fp16, calibrated INT8 for int8) when it is installed, or else to ONNX
+    Runtime at fp32. Both run fused oneDNN/MLAS kernels and are typically
+    2-4x faster than PyTorch eager. Without either, the PyTorch weights are used.
+    INT8 on CPU needs OpenVINO; without it int8 falls back to the fp32 path.
+
+    Exported models are created once on first use and stored next to the
+    weights, one per precision, input size and batch. Loaded models are also
+    cached per process, so callers that run several jobs back to back (e.g.
+    a web app importing simple_track.run) only pay for loading once.
+
+    Args:
+        weights: Path to the .pt weights
+        precision: One of PRECISIONS
+        batch: Maximum frames per inference call (baked into the engine)
+        imgsz: Inference image size for the exported engine
+        device: Inference device ("cpu", "cuda", or None for auto)
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+    on_cuda = str(device).startswith("cuda") if device is not None else torch.cuda.is_available()
+    if on_cuda:
+        if precision == "fp32":
+            return YOLO(weights)
+        export_format, suffix = "engine", ".engine"
+    elif CPU_BACKEND == "openvino":
+        export_format, suffix = "openvino", "_openvino_model"
+    elif precision == "int8":
+        # TensorRT export needs a CUDA GPU, so without OpenVINO there is no INT8 CPU runtime
+        print("INT8 on CPU needs OpenVINO (pip install openvino), running the detector at fp32")
+        return load_detector(weights, "fp32", batch=batch, imgsz=imgsz, device=device)
+    elif CPU_BACKEND == "onnx":
+        export_format, suffix = "onnx", ".onnx"
+    else:
+        return YOLO(weights)
+
+    weights_path = Path(weights)
+    export_path = weights_path.with_name(f"{weights_path.stem}_{precision}_{imgsz}_b{batch}{suffix}")
+    if not export_path.exists():
+        print(f"Exporting {precision.upper()} {export_format} model (one-time): {export_path}")
+        if precision == "int8":
+            precision_args = {"int8": True, "data": "coco.yaml"}
+        else:
+            # ONNX Runtime on CPU stays at fp32, half=True is a GPU-only export there
+            precision_args = {"half": precision == "fp16" and export_format != "onnx"}
+        export_args = {"workspace": 4} if export_format == "engine" else {}
+        exported = YOLO(weights).export(
+            format=export_format, imgsz=imgsz, batch=batch, dynamic=batch > 1,
+            **precision_args, **export_args
+        )
+        Path(exported).rename(export_path)
+
+    return YOLO(str(export_path), task="detect")
+
+
+def configure_torch(device: Optional[str] = None):
+    """
+    Apply torch settings for inference-only runs.
+
+    Disables autograd on the calling thread (pipeline stages wrap themselves
+    in torch.inference_mode, which is per-thread too). On CPU, caps torch's
+    intra-op threads at half the cores so inference doesn't oversubscribe
+    the decode and annotation threads.
+    """
+    torch.set_grad_enabled(False)
+    if device == "cpu" or (device is None and not torch.cuda.is_available()):
+        torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+
+
+def resize_for_inference(frame: np.ndarray, imgsz: int = 640) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Downscale a frame so its longer side matches the model input size.
+
+    YOLO letterboxes every frame to imgsz anyway; resizing up front lets the
+    full-resolution frame stay on the annotation path while only the small
+    copy goes through preprocessing and host-to-device transfer.
+
+    The rest of the letterbox is left to YOLO. Building the batch with
+    cv2.dnn.blobFromImages instead measured slower: about 3x for the float
+    blob and on par for a uint8 one, against YOLO's stack/transpose with the
+    float conversion done on the device.
+
+    Returns:
+        (small_frame, scale) where scale is a float32 [sx, sy, sx, sy] array
+        that maps xyxy boxes on small_frame back to the original frame
+    """
+    h, w = frame.shape[:2]
+    ratio = imgsz / max(h, w)
+    if ratio >= 1.0:
+        return frame, np.ones(4, dtype=np.float32)
+
+    new_w, new_h = max(1, round(w * ratio)), max(1, round(h * ratio))
+    small = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_AREA)
+    scale = np.array([w / new_w, h / new_h, w / new_w, h / new_h], dtype=np.float32)
+    return small, scale
+
+
+class PinnedUploader:
+    """
+    Copies downscaled frames to the GPU from pinned host memory on a side CUDA stream.
+
+    upload() is meant to run on the reader thread: the frame is written into a
+    page-locked buffer and copied with non_blocking=True on its own stream, so
+    the host-to-device transfer overlaps with inference on the previous batch
+    instead of happening inside the model call. Pinned blocks come from
+    torch's caching host allocator, which only reuses a block once its copy
+    has finished.
+
+    batch() stacks uploaded frames into the normalized RGB BCHW tensor that
+    YOLO accepts directly, skipping its own preprocessing. Frames are padded
+    bottom/right to a multiple of 32 (or to a square for TensorRT engines,
+    whose input shape is fixed), so boxes come back in the coordinates of the
+    downscaled frame.
+    """
+
+    PAD_VALUE = 114  # Same gray as YOLO's letterbox
+
+    def __init__(self, device: str = "cuda", square: Optional[int] = None, stride: int = 32):
+        self.device = torch.device(device)
+        self.stream = torch.cuda.Stream(device=self.device)
+        self.square = square
+        self.stride = stride
+
+    def upload(self, frame: np.ndarray) -> Tuple[torch.Tensor, "torch.cuda.Event"]:
+        """Start copying a BGR frame to the GPU; returns the device tensor and its ready event"""
+        h, w = frame.shape[:2]
+        if self.square is not None:
+            padded_h = padded_w = self.square
+        else:
+            padded_h = -(-h // self.stride) * self.stride
+            padded_w = -(-w // self.stride) * self.stride
+
+        pinned = torch.full((padded_h, padded_w, 3), self.PAD_VALUE, dtype=torch.uint8, pin_memory=True)
+        pinned.numpy()[:h, :w] = frame[..., ::-1]  # BGR -> RGB
+
+        with torch.cuda.stream(self.stream):
+            on_device = pinned.to(self.device, non_blocking=True)
+            ready = torch.cuda.Event()
+            ready.record(self.stream)
+        return on_device, ready
+
+    def batch(self, uploads) -> torch.Tensor:
+        """Stack (tensor, ready) pairs from upload() into a float BCHW batch in [0, 1]"""
+        stream = torch.cuda.current_stream(self.device)
+        for on_device, ready in uploads:
+            stream.wait_event(ready)
+            # Allocated on the side stream but consumed here
+            on_device.record_stream(stream)
+        return torch.stack([on_device for on_device, _ in uploads]).permute(0, 3, 1, 2).float().div_(255)
+
+
+def warmup(model, height: int, width: int, runs: int = 3, **predict_kwargs):
+    """
+    Run a few dummy inferences before processing starts.
+
+    The first YOLO call pays for lazy initialisation, cuDNN autotuning and
+    VRAM allocation, which is many times a steady-state inference. Warming up
+    keeps that cost out of the first real frame.
+
+    When imgsz is given, the dummy frame is downscaled with resize_for_inference
+    like the real ones, so the warm-up runs the same input shape.
+
+    Args:
+        model: YOLO model to warm up
+        height: Frame height used for the dummy input
+        width: Frame width used for the dummy input
+        runs: Number of dummy inferences
+        **predict_kwargs: Extra arguments passed to the model call (device, conf, imgsz, ...)
+    """
+    dummy = np.zeros((height, width, 3), dtype=np.uint8)
+    if "imgsz" in predict_kwargs:
+        dummy, _ = resize_for_inference(dummy, predict_kwargs["imgsz"])
+    with torch.inference_mode():
+        for _ in range(runs):
+            model(dummy, verbose=False, **predict_kwargs)
+
+    # Let the CUDA allocator settle before timing starts
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
@@ -0,0 +1,462 @@
+"""
+Video input/output helpers shared by the tracking scripts
+"""
+
+import queue
+import threading
+import time
+from fractions import Fraction
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+import cv2
+import numpy as np
+import supervision as sv
+
+try:
+    import av  # Optional: PyAV, for FFmpeg encoders OpenCV wasn't built with (e.g. NVENC)
+except ImportError:
+    av = None
+
+
+_STOP = object()
+
+
+class _StageError:
+    """Carries an exception raised inside a pipeline stage to the consumer"""
+
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def batched(iterable: Iterable, n: int) -> Iterator[list]:
+    """Group an iterable into lists of up to n items (the last batch may be shorter)"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def video_info_from_capture(cap: cv2.VideoCapture) -> sv.VideoInfo:
+    """Read stream metadata from an already open capture instead of opening the file again"""
+    return sv.VideoInfo(
+        width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        fps=float(cap.get(cv2.CAP_PROP_FPS)),
+        total_frames=int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    )
+
+
+def paced(iterable: Iterable, fps: float) -> Iterator:
+    """
+    Yield items no faster than fps, as a live camera would deliver frames.
+
+    Used with Pipeline(drop_stale=True) to replay a video file in real time;
+    a live stream is already paced by the camera, so no sleep happens there.
+    """
+    period = 1.0 / fps
+    start = time.perf_counter()
+    for i, item in enumerate(iterable):
+        delay = start + i * period - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        yield item
+
+
+class VideoSource:
+    """
+    Frame source backed by cv2.VideoCapture.
+
+    On CUDA devices the FFmpeg backend is asked for hardware decoding (NVDEC),
+    so demuxing and YUV->BGR conversion run on the GPU instead of a CPU core.
+    Falls back to regular CPU decoding when no hardware decoder is available.
+    """
+
+    def __init__(self, path: str, device: Optional[str] = None):
+        self.path = path
+        self.hw_accelerated = False
+        self.cap = None
+
+        if device is not None and str(device).startswith("cuda"):
+            self.cap = self._open_hw_capture(path)
+
+        if self.cap is None:
+            self.cap = cv2.VideoCapture(path)
+
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video: {path}")
+
+    def _open_hw_capture(self, path: str) -> Optional[cv2.VideoCapture]:
+        """Open the video with hardware decoding, or return None if unsupported"""
+        params = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        try:
+            cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG, params)
+        except (cv2.error, AttributeError):
+            return None
+
+        if not cap.isOpened():
+            cap.release()
+            return None
+
+        self.hw_accelerated = cap.get(cv2.CAP_PROP_HW_ACCELERATION) != cv2.VIDEO_ACCELERATION_NONE
+        return cap
+
+    @property
+    def video_info(self) -> sv.VideoInfo:
+        """Resolution, frame rate and frame count of the open video"""
+        return video_info_from_capture(self.cap)
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Read the next frame"""
+        return self.cap.read()
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        while True:
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            yield frame
+
+    def sample(self, stride: int = 1) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yield (frame_number, frame) for every stride-th frame, starting with the first.
+
+        Skipped frames are only grabbed, never retrieved, so they don't pay for
+        colour conversion and the copy into a new BGR array. Frame numbers
+        count every frame of the video (1-based), so timestamps stay correct.
+        """
+        frame_number = 0
+        while self.cap.grab():
+            frame_number += 1
+            if (frame_number - 1) % stride:
+                continue
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                break
+            yield frame_number, frame
+
+    def release(self):
+        """Release the underlying capture"""
+        self.cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class _PyAVWriter:
+    """cv2.VideoWriter look-alike that encodes BGR frames with a named FFmpeg encoder through PyAV"""
+
+    def __init__(self, path: str, encoder: str, fps: float, frame_size: Tuple[int, int]):
+        self.container = av.open(path, mode="w")
+        try:
+            self.stream = self.container.add_stream(encoder, rate=Fraction(fps).limit_denominator(1001))
+            self.stream.width, self.stream.height = frame_size
+            self.stream.pix_fmt = "yuv420p"
+            # Open now so a missing GPU or driver shows up here rather than on the first frame
+            self.stream.codec_context.open()
+        except BaseException:
+            self.container.close()
+            raise
+
+    def isOpened(self) -> bool:
+        return self.container is not None
+
+    def write(self, frame: np.ndarray):
+        for packet in self.stream.encode(av.VideoFrame.from_ndarray(frame, format="bgr24")):
+            self.container.mux(packet)
+
+    def release(self):
+        if self.container is None:
+            return
+        # Flush the frames still buffered in the encoder
+        for packet in self.stream.encode():
+            self.container.mux(packet)
+        self.container.close()
+        self.container = None
+
+
+class FrameWriter:
+    """
+    cv2.VideoWriter that encodes on a background thread.
+
+    write() only enqueues the frame (blocking when the bounded queue is full),
+    so encoding overlaps with detection and annotation instead of stalling
+    the loop that produces frames. Frames must not be modified after they are
+    written. On CUDA devices the FFmpeg backend is asked for a hardware
+    H.264 encoder (NVENC and friends don't implement MPEG-4 'mp4v'), falling
+    back to regular CPU encoding with the requested fourcc when none is
+    available.
+
+    Pip builds of OpenCV usually ship without NVENC, so an FFmpeg encoder can
+    also be named explicitly (e.g. "h264_nvenc"); it is opened through PyAV
+    and falls back to cv2.VideoWriter with the fourcc if PyAV or the encoder
+    is unavailable.
+    """
+
+    HW_FOURCC = cv2.VideoWriter_fourcc(*"avc1")
+
+    def __init__(
+        self,
+        path: str,
+        fourcc: int,
+        fps: float,
+        frame_size: Tuple[int, int],
+        device: Optional[str] = None,
+        maxsize: int = 8,
+        encoder: Optional[str] = None
+    ):
+        self.hw_accelerated = False
+        self.writer = None
+        self._error = None
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+
+        if encoder is not None:
+            self.writer = self._open_pyav_writer(path, encoder, fps, frame_size)
+
+        if self.writer is None and device is not None and str(device).startswith("cuda"):
+            self.writer = self._open_hw_writer(path, fourcc, fps, frame_size)
+
+        if self.writer is None:
+            self.writer = cv2.VideoWriter(path, fourcc, fps, frame_size)
+
+        if self.writer.isOpened():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _open_hw_writer(self, path, fourcc, fps, frame_size) -> Optional[cv2.VideoWriter]:
+        """Open the writer with hardware H.264 encoding, or return None if unsupported"""
+        params = [cv2.VIDEOWRITER_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        try:
+            writer = cv2.VideoWriter(path, cv2.CAP_FFMPEG, self.HW_FOURCC, fps, frame_size, params)
+        except (cv2.error, AttributeError):
+            return None
+
+        if not writer.isOpened():
+            writer.release()
+            return None
+
+        self.hw_accelerated = writer.get(cv2.VIDEOWRITER_PROP_HW_ACCELERATION) != cv2.VIDEO_ACCELERATION_NONE
+        return writer
+
+    def _open_pyav_writer(self, path, encoder, fps, frame_size) -> Optional[_PyAVWriter]:
+        """Open a PyAV writer for the named FFmpeg encoder, or return None if unavailable"""
+        if av is None:
+            print(f"Warning: PyAV is not installed, can't use encoder '{encoder}'; falling back to OpenCV")
+            return None
+        try:
+            writer = _PyAVWriter(path, encoder, fps, frame_size)
+        except (av.FFmpegError, ValueError) as e:
+            print(f"Warning: Could not open encoder '{encoder}' ({e}); falling back to OpenCV")
+            return None
+
+        self.hw_accelerated = not encoder.startswith("lib")  # libx264 etc. are software encoders
+        return writer
+
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self.writer.write(frame)
+            except BaseException as e:
+                self._error = e
+
+    def isOpened(self) -> bool:
+        return self.writer.isOpened()
+
+    def write(self, frame: np.ndarray):
+        """Queue a frame for encoding"""
+        if self._error is not None:
+            raise self._error
+        if self._thread is None:
+            # Writer failed to open: drop the frame like cv2.VideoWriter.write does
+            return
+        self._queue.put(frame)
+
+    def release(self):
+        """Finish encoding the queued frames and release the writer"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self.writer.release()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class FrameDisplay:
+    """
+    Shows frames in an OpenCV window from a background thread.
+
+    show() never blocks: the display thread always takes the newest frame and
+    older ones are dropped, so imshow/waitKey stay off the processing path.
+    Pressing 'q' in the window sets quit_requested. All HighGUI calls happen
+    on the display thread.
+    """
+
+    def __init__(self, window_name: str):
+        self.window_name = window_name
+        self.quit_requested = threading.Event()
+        self._closed = threading.Event()
+        self._queue = queue.Queue(maxsize=1)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._closed.is_set():
+            try:
+                frame = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            cv2.imshow(self.window_name, frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                self.quit_requested.set()
+        cv2.destroyAllWindows()
+
+    def show(self, frame: np.ndarray):
+        """Queue a frame for display, replacing one that hasn't been shown yet"""
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(frame)
+            except queue.Full:
+                pass
+
+    def close(self):
+        """Stop the display thread and close its window"""
+        self._closed.set()
+        self._thread.join()
+
+
+class Pipeline:
+    """
+    Run generator stages on worker threads connected by bounded queues.
+
+    The source is iterated on its own thread and every stage consumes the
+    previous stage's output on a dedicated thread, so decoding, inference and
+    annotation overlap and throughput is limited by the slowest stage instead
+    of their sum. Each stage is a function taking an iterator and yielding
+    results; single-threaded stages keep items in order, so stateful work such
+    as tracking stays sequential. Results are yielded on the calling thread.
+
+    With drop_stale=True the source queue holds a single item and the reader
+    replaces it instead of waiting, so the first stage always gets the newest
+    frame and latency stays bounded when inference can't keep up with a live
+    source. The number of discarded items is kept in `dropped`.
+
+    Usage:
+        with Pipeline(frames, [detect, annotate]) as pipeline:
+            for result in pipeline:
+                ...
+    """
+
+    def __init__(
+        self,
+        source: Iterable,
+        stages: List[Callable[[Iterator], Iterator]],
+        maxsize: int = 4,
+        drop_stale: bool = False
+    ):
+        self._stop = threading.Event()
+        self._drop_stale = drop_stale
+        self.dropped = 0
+        self._queues = [queue.Queue(maxsize=maxsize) for _ in range(len(stages) + 1)]
+        if drop_stale:
+            self._queues[0] = queue.Queue(maxsize=1)
+        self._threads = [
+            threading.Thread(target=self._run_stage, args=(lambda _: iter(source), None, self._queues[0]), daemon=True)
+        ]
+        for i, stage in enumerate(stages):
+            self._threads.append(threading.Thread(
+                target=self._run_stage,
+                args=(stage, self._queues[i], self._queues[i + 1]),
+                daemon=True
+            ))
+        for thread in self._threads:
+            thread.start()
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Put an item, giving up if the pipeline is shutting down"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _put_latest(self, q: queue.Queue, item) -> bool:
+        """Put an item, discarding the queued one if the consumer hasn't taken it yet"""
+        while not self._stop.is_set():
+            try:
+                q.put_nowait(item)
+                return True
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        return False
+
+    def _iter_queue(self, q: queue.Queue) -> Iterator:
+        """Yield items from a queue until the upstream stage finishes"""
+        while True:
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            if item is _STOP:
+                return
+            if isinstance(item, _StageError):
+                raise item.exc
+            yield item
+
+    def _run_stage(self, stage: Callable, in_q: Optional[queue.Queue], out_q: queue.Queue):
+        try:
+            items = self._iter_queue(in_q) if in_q is not None else None
+            put = self._put_latest if in_q is None and self._drop_stale else self._put
+            for item in stage(items):
+                if not put(out_q, item):
+                    return
+        except BaseException as e:
+            self._put(out_q, _StageError(e))
+            return
+        self._put(out_q, _STOP)
+
+    def __iter__(self) -> Iterator:
+        return self._iter_queue(self._queues[-1])
+
+    def close(self):
+        """Stop all stages and wait for the worker threads to exit"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -10,11 +10,14 @@ from pathlib import Path
 from typing import Dict, List, Optional
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import supervision as sv
+import torch
 
-from .zone_tracker import ZoneTracker
+from ._activity_kernels import box_centers_in_raster
+from .zone_tracker import ZoneTracker, analytics_paths
 from .enhanced_tracker import EnhancedTracker
+from .inference import configure_torch, load_detector, resize_for_inference, warmup
+from .video_io import FrameDisplay, FrameWriter, VideoSource, batched
 
 
 class ZoneAnalyzer:
@@ -25,9 +28,14 @@ class ZoneAnalyzer:
         model_path: str = "yolov8n.pt",
         device: str = "cpu",
         confidence_threshold: float = 0.3,
-        iou_threshold: float = 0.7
+        iou_threshold: float = 0.7,
+        batch_size: int = 4,
+        precision: str = "fp32",
+        imgsz: int = 640
     ):
-        self.model = YOLO(model_path)
+        self.batch_size = max(1, batch_size)  # Frames per YOLO call
+        self.imgsz = imgsz  # Model input size; frames are downscaled to this before inference
+        self.model = load_detector(model_path, precision, batch=self.batch_size, imgsz=imgsz, device=device)
         # Use EnhancedTracker with ghost buffer to prevent ID reassignment
         self.tracker = EnhancedTracker(
             track_activation_threshold=0.25,   # Lower threshold for initial detection
@@ -36,7 +44,8 @@ class ZoneAnalyzer:
             minimum_consecutive_frames=3,      # Require 3 frames before assigning new ID (reduce noise)
             ghost_buffer_frames=150,           # Keep ghost tracks for 5 seconds at 30fps
             ghost_iou_threshold=0.2,           # LOWER = more lenient ghost matching
-            ghost_distance_threshold=200.0     # HIGHER = match people further away
+            ghost_distance_threshold=200.0,    # HIGHER = match people further away
+            log_level="off"                    # The tracking log is never exported here
         )
         self.device = device
         self.confidence_threshold = confidence_threshold
@@ -45,8 +54,20 @@ class ZoneAnalyzer:
         # Color scheme for visualization
         self.colors = sv.ColorPalette.from_hex(["#E6194B", "#3CB44B", "#FFE119", "#3C76D1", "#F032E6"])
         self.color_annotator = sv.ColorAnnotator(color=self.colors)
+        # BGR tuples for cv2 text, indexed by zone_idx % len(self.zone_bgr)
+        self.zone_bgr = [color.as_bgr() for color in self.colors.colors]
+
+        # Detection palette: zone colors followed by gray for people outside zones
+        self.outside_color_idx = len(self.colors.colors)
+        detection_colors = sv.ColorPalette(colors=self.colors.colors + [sv.Color(r=128, g=128, b=128)])
+        self.box_annotator = sv.BoxAnnotator(color=detection_colors, thickness=2)
         self.label_annotator = sv.LabelAnnotator(
-            color=self.colors, text_color=sv.Color.from_hex("#000000")
+            color=detection_colors,
+            text_color=sv.Color.WHITE,
+            text_scale=0.6,
+            text_thickness=2,
+            text_padding=5,
+            text_position=sv.Position.TOP_LEFT
         )
     
     def load_zones(self, zone_config_path: str) -> List[sv.PolygonZone]:
@@ -65,6 +86,50 @@ class ZoneAnalyzer:
         
         print(f"Loaded {len(zones)} zones from {zone_config_path}")
         return zones
+
+    def _pack_zone_masks(self, zones: List[sv.PolygonZone]) -> np.ndarray:
+        """
+        Pack every zone's fill mask into one bit raster of shape (height, width, bytes).
+
+        Bit z of a pixel is set when the pixel lies in zone z, so a lookup reads
+        ceil(zones / 8) bytes per detection instead of one mask per zone, and
+        overlapping zones keep working. Pixels outside a zone's mask are unset.
+        """
+        height = max((zone.mask.shape[0] for zone in zones), default=1)
+        width = max((zone.mask.shape[1] for zone in zones), default=1)
+        zone_bits = np.zeros((height, width, (len(zones) + 7) // 8), dtype=np.uint8)
+        for zone_idx, zone in enumerate(zones):
+            zone_h, zone_w = zone.mask.shape
+            zone_bits[:zone_h, :zone_w, zone_idx // 8] |= zone.mask.astype(np.uint8) << (zone_idx % 8)
+        return zone_bits
+
+    def _zone_hits(self, zone_bits: np.ndarray, num_zones: int, detections: sv.Detections) -> np.ndarray:
+        """
+        Test every detection against every zone in one lookup.
+
+        Same test as PolygonZone.trigger with a CENTER anchor, but the centers,
+        rounding and bit lookups for all zones run in one kernel (compiled
+        with Numba when available).
+
+        Returns:
+            Boolean array of shape (zones, detections)
+        """
+        return box_centers_in_raster(detections.xyxy, zone_bits, num_zones)
+
+    @torch.inference_mode()
+    def _detect(self, frames):
+        """Run YOLO on batches of downscaled frames, yielding (frame, detections) in order"""
+        for batch in batched(frames, self.batch_size):
+            inputs = [resize_for_inference(frame, self.imgsz) for frame in batch]
+            results_list = self.model(
+                [small for small, _ in inputs], imgsz=self.imgsz, verbose=False,
+                device=self.device, conf=self.confidence_threshold
+            )
+            for frame, (_, scale), results in zip(batch, inputs, results_list):
+                detections = sv.Detections.from_ultralytics(results)
+                # Map boxes back to full resolution for tracking and annotation
+                detections.xyxy = detections.xyxy * scale
+                yield frame, detections
     
     def process_video(
         self,
@@ -78,8 +143,18 @@ class ZoneAnalyzer:
         
         # Load zones and initialize tracking
         zones = self.load_zones(zone_config_path)
-        video_info = sv.VideoInfo.from_video_path(video_path)
-        zone_tracker = ZoneTracker(fps=video_info.fps)
+        source = VideoSource(video_path, device=self.device)
+        video_info = source.video_info
+        # Entry/exit events are streamed straight to the analytics CSV
+        zone_tracker = ZoneTracker(fps=video_info.fps, events_path=analytics_paths(analytics_output)[0])
+        zone_bits = self._pack_zone_masks(zones)
+        # Outline and color per zone, looked up once instead of every frame
+        # (the outlines themselves are redrawn per frame: cv2.polylines only touches
+        # edge pixels, which is cheaper than compositing a cached full-frame overlay)
+        zone_outlines = [
+            (zone.polygon, self.zone_bgr[zone_idx % len(self.zone_bgr)])
+            for zone_idx, zone in enumerate(zones)
+        ]
         
         # Video writer setup
         video_writer = None
@@ -92,11 +167,12 @@ class ZoneAnalyzer:
             for codec in codecs:
                 try:
                     fourcc = cv2.VideoWriter_fourcc(*codec)
-                    writer = cv2.VideoWriter(
+                    writer = FrameWriter(
                         output_path,
                         fourcc,
                         video_info.fps,
-                        (video_info.width, video_info.height)
+                        (video_info.width, video_info.height),
+                        device=self.device
                     )
                     if writer.isOpened():
                         video_writer = writer
@@ -109,59 +185,67 @@ class ZoneAnalyzer:
 
             if not video_writer:
                 print("Warning: Could not initialize video writer with preferred codec, using default")
-                video_writer = cv2.VideoWriter(
+                video_writer = FrameWriter(
                     output_path,
                     cv2.VideoWriter_fourcc(*'mp4v'),
                     video_info.fps,
                     (video_info.width, video_info.height)
                 )
         
-        cap = cv2.VideoCapture(video_path)
-        
         print(f"Processing video: {video_path}")
         print(f"FPS: {video_info.fps}, Resolution: {video_info.width}x{video_info.height}")
         print(f"Total frames: {video_info.total_frames}")
+        if source.hw_accelerated:
+            print("Using hardware-accelerated video decoding")
+
+        configure_torch(self.device)
+
+        # Warm up the detector so the first frame isn't a cold-start outlier
+        warmup(
+            self.model, video_info.height, video_info.width,
+            device=self.device, conf=self.confidence_threshold, imgsz=self.imgsz
+        )
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
+        # Display runs on its own thread so imshow/waitKey don't stall processing
+        display = FrameDisplay("Zone Tracking") if show_display else None
+
+        # Run YOLO detection in batches - filter for person class (class_id = 0)
+        for frame, detections in self._detect(source):
             zone_tracker.frame_count += 1
             
-            # Run YOLO detection - filter for person class (class_id = 0)
-            results = self.model(frame, verbose=False, device=self.device, conf=self.confidence_threshold)[0]
-            detections = sv.Detections.from_ultralytics(results)
-            
             # Filter for person class only
             person_mask = detections.class_id == 0
             detections = detections[person_mask]
             
-            # Apply NMS and tracking with better parameters
-            detections = detections.with_nms(threshold=self.iou_threshold)
+            # Apply NMS and tracking with better parameters (empty frames have nothing
+            # to suppress, but still go through the tracker so lost tracks age)
+            if len(detections) > 0:
+                detections = detections.with_nms(threshold=self.iou_threshold)
             detections = self.tracker.update_with_detections(detections)
             
             # Filter out detections without valid tracker IDs
             valid_tracker_mask = detections.tracker_id != -1
             detections = detections[valid_tracker_mask]
+            # Native ints once per frame, so dict/set lookups below don't convert np.int64 each time
+            ids = detections.tracker_id.tolist()
             
             # Process each zone
-            annotated_frame = frame.copy()
+            # Annotate the decoded frame in place: each read returns a fresh
+            # buffer that isn't needed afterwards, so a full-frame copy is wasted
+            annotated_frame = frame
 
             # Track which person IDs are in zones (for coloring)
             person_zone_mapping = {}  # person_id -> zone_idx
 
-            for zone_idx, zone in enumerate(zones):
+            # Zone membership for every (zone, detection) pair at once
+            zone_hits = self._zone_hits(zone_bits, len(zones), detections)
+
+            for zone_idx, (outline, color_bgr) in enumerate(zone_outlines):
                 # Draw zone
-                annotated_frame = sv.draw_polygon(
-                    scene=annotated_frame,
-                    polygon=zone.polygon,
-                    color=self.colors.by_idx(zone_idx)
-                )
+                cv2.polylines(annotated_frame, [outline], isClosed=True, color=color_bgr, thickness=2)
 
                 # Get detections in this zone
-                detections_in_zone = detections[zone.trigger(detections)]
-                person_ids_in_zone = set(detections_in_zone.tracker_id) if len(detections_in_zone) > 0 else set()
+                person_ids_in_zone = {ids[i] for i in np.flatnonzero(zone_hits[zone_idx])}
 
                 # Update zone tracking
                 zone_tracker.update_zone_tracking(zone_idx, person_ids_in_zone)
@@ -172,71 +256,48 @@ class ZoneAnalyzer:
 
             # Draw ALL detections (both in zones and outside zones)
             if len(detections) > 0:
-                for i, (xyxy, person_id) in enumerate(zip(detections.xyxy, detections.tracker_id)):
-                    # Determine color based on zone
-                    if person_id in person_zone_mapping:
-                        zone_idx = person_zone_mapping[person_id]
-                        color = self.colors.by_idx(zone_idx).as_bgr()
-
-                        # Calculate time in zone
-                        time_in_zone = 0
-                        if (zone_idx in zone_tracker.zone_entries and
-                            person_id in zone_tracker.zone_entries[zone_idx]):
-                            entry_time = zone_tracker.zone_entries[zone_idx][person_id]
-                            time_in_zone = (datetime.now() - entry_time).total_seconds()
-
-                        label = f"#{person_id} {int(time_in_zone//60):02d}:{int(time_in_zone%60):02d}"
-                    else:
-                        # Person outside zones - use gray
-                        color = (128, 128, 128)
-                        label = f"#{person_id}"
-
-                    # Draw bounding box
-                    cv2.rectangle(
-                        annotated_frame,
-                        (int(xyxy[0]), int(xyxy[1])),
-                        (int(xyxy[2]), int(xyxy[3])),
-                        color,
-                        2
-                    )
+                # Color index per detection: zone color, or gray for people outside zones
+                color_lookup = np.full(len(detections), self.outside_color_idx, dtype=int)
+                labels = []
+                now = datetime.now()  # One clock read for every label on this frame
+                for i, person_id in enumerate(ids):
+                    zone_idx = person_zone_mapping.get(person_id)
+                    if zone_idx is not None:
+                        color_lookup[i] = zone_idx % self.outside_color_idx
 
-                    # Draw label background
-                    label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                    cv2.rectangle(
-                        annotated_frame,
-                        (int(xyxy[0]), int(xyxy[1]) - label_size[1] - 10),
-                        (int(xyxy[0]) + label_size[0] + 10, int(xyxy[1])),
-                        color,
-                        -1
-                    )
+                        # Calculate time in zone (one lookup per dict instead of test-then-index)
+                        entry_time = zone_tracker.zone_entries.get(zone_idx, {}).get(person_id)
+                        time_in_zone = (now - entry_time).total_seconds() if entry_time is not None else 0
 
-                    # Draw label text
-                    cv2.putText(
-                        annotated_frame,
-                        label,
-                        (int(xyxy[0]) + 5, int(xyxy[1]) - 5),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.6,
-                        (255, 255, 255),
-                        2
-                    )
+                        labels.append(f"#{person_id} {int(time_in_zone//60):02d}:{int(time_in_zone%60):02d}")
+                    else:
+                        labels.append(f"#{person_id}")
+
+                # Boxes, label backgrounds and text are drawn in one pass per annotator
+                annotated_frame = self.box_annotator.annotate(
+                    scene=annotated_frame, detections=detections, custom_color_lookup=color_lookup
+                )
+                annotated_frame = self.label_annotator.annotate(
+                    scene=annotated_frame, detections=detections, labels=labels,
+                    custom_color_lookup=color_lookup
+                )
 
-            # Add zone info text for each zone
+            # Add zone info text for each zone (occupancy is read directly; the
+            # full analytics summary is only needed for export)
             for zone_idx in range(len(zones)):
-                zone_analytics = zone_tracker.get_zone_analytics(zone_idx)
-                zone_text = f"Zone {zone_idx}: {zone_analytics['current_occupancy']} people"
+                zone_text = f"Zone {zone_idx}: {len(zone_tracker.zone_current[zone_idx])} people"
                 cv2.putText(
                     annotated_frame,
                     zone_text,
                     (10, 30 + zone_idx * 25),
                     cv2.FONT_HERSHEY_SIMPLEX,
                     0.7,
-                    self.colors.by_idx(zone_idx).as_bgr(),
+                    self.zone_bgr[zone_idx % len(self.zone_bgr)],
                     2
                 )
 
             # Add frame info and detection stats
-            active_ids = list(detections.tracker_id) if len(detections) > 0 else []
+            active_ids = ids
             ghost_count = self.tracker.get_ghost_count()
 
             frame_text = f"Frame: {zone_tracker.frame_count} | Time: {zone_tracker.frame_count/video_info.fps:.1f}s"
@@ -251,17 +312,17 @@ class ZoneAnalyzer:
             if video_writer:
                 video_writer.write(annotated_frame)
             
-            if show_display:
-                cv2.imshow("Zone Tracking", annotated_frame)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+            if display:
+                display.show(annotated_frame)
+                if display.quit_requested.is_set():
                     break
         
         # Cleanup
-        cap.release()
+        source.release()
         if video_writer:
             video_writer.release()
-        if show_display:
-            cv2.destroyAllWindows()
+        if display:
+            display.close()
 
         # Re-encode video with H.264 for browser compatibility
         if output_path and os.path.exists(output_path):
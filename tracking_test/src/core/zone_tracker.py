@@ -2,17 +2,40 @@
 Zone tracking core functionality
 """
 
+import csv
 import json
 from datetime import datetime
-from typing import Dict, List, Set
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
 import numpy as np
 import pandas as pd
 
 
+def analytics_paths(output_path: str) -> Tuple[str, str, str]:
+    """CSV, Excel and JSON paths for an analytics output, in analytics/{csv,excel,json}/ next to it"""
+    base_name = Path(output_path).stem
+    output_dir = Path(output_path).parent
+    return (
+        str(output_dir / 'analytics' / 'csv' / f'{base_name}.csv'),
+        str(output_dir / 'analytics' / 'excel' / f'{base_name}.xlsx'),
+        str(output_dir / 'analytics' / 'json' / f'{base_name}.json'),
+    )
+
+
 class ZoneTracker:
     """Enhanced zone tracker that monitors person entry/exit and time spent"""
+
+    # Columns of the entry/exit event log; events are kept as plain tuples in
+    # this order rather than one dict per event
+    EVENT_FIELDS = ('timestamp', 'frame', 'frame_time_sec', 'person_id', 'zone_id', 'event', 'duration_sec')
     
-    def __init__(self, fps: int = 30):
+    def __init__(self, fps: int = 30, events_path: Optional[str] = None):
+        """
+        Args:
+            fps: Video frame rate, used to convert frame numbers to seconds
+            events_path: CSV file to stream entry/exit events to as they happen;
+                without it events are kept in memory until export_analytics
+        """
         self.fps = fps
         self.frame_count = 0
         
@@ -23,7 +46,15 @@ class ZoneTracker:
         self.zone_current: Dict[int, Set[int]] = {}            # zone_id -> {person_ids currently in zone}
         
         # Analytics data for export
-        self.analytics_data: List[Dict] = []
+        self.analytics_data: List[tuple] = []  # Rows of EVENT_FIELDS (when not streamed)
+        self.event_count = 0
+        self.events_path = events_path
+        self._events_file = None
+        if events_path:
+            Path(events_path).parent.mkdir(parents=True, exist_ok=True)
+            self._events_file = open(events_path, 'w', newline='')
+            self._events_writer = csv.writer(self._events_file)
+            self._events_writer.writerow(self.EVENT_FIELDS)
         
     def initialize_zone(self, zone_id: int):
         """Initialize tracking data for a new zone"""
@@ -39,6 +70,9 @@ class ZoneTracker:
         
         current_time = datetime.now()
         frame_time = self.frame_count / self.fps
+        # Shared by every event logged this frame
+        timestamp = current_time.isoformat()
+        frame_time_sec = round(frame_time, 2)
         
         # Check for new entries
         new_entries = person_ids_in_zone - self.zone_current[zone_id]
@@ -47,15 +81,7 @@ class ZoneTracker:
             print(f"Person {person_id} entered Zone {zone_id} at frame {self.frame_count}")
             
             # Log entry event
-            self.analytics_data.append({
-                'timestamp': current_time.isoformat(),
-                'frame': self.frame_count,
-                'frame_time_sec': round(frame_time, 2),
-                'person_id': person_id,
-                'zone_id': zone_id,
-                'event': 'entry',
-                'duration_sec': None
-            })
+            self._log_event((timestamp, self.frame_count, frame_time_sec, person_id, zone_id, 'entry', None))
         
         # Check for exits
         exits = self.zone_current[zone_id] - person_ids_in_zone
@@ -75,19 +101,27 @@ class ZoneTracker:
                 print(f"Person {person_id} exited Zone {zone_id} after {duration:.1f}s")
                 
                 # Log exit event
-                self.analytics_data.append({
-                    'timestamp': current_time.isoformat(),
-                    'frame': self.frame_count,
-                    'frame_time_sec': round(frame_time, 2),
-                    'person_id': person_id,
-                    'zone_id': zone_id,
-                    'event': 'exit',
-                    'duration_sec': round(duration, 2)
-                })
+                self._log_event(
+                    (timestamp, self.frame_count, frame_time_sec, person_id, zone_id, 'exit', round(duration, 2))
+                )
         
         # Update current zone occupancy
         self.zone_current[zone_id] = person_ids_in_zone.copy()
     
+    def _log_event(self, row: tuple):
+        """Write an event row to the events CSV, or keep it for export_analytics"""
+        if self._events_file is not None:
+            self._events_writer.writerow(row)
+        else:
+            self.analytics_data.append(row)
+        self.event_count += 1
+
+    def close(self):
+        """Flush and close the streamed events CSV (safe to call more than once)"""
+        if self._events_file is not None:
+            self._events_file.close()
+            self._events_file = None
+
     def get_zone_analytics(self, zone_id: int) -> Dict:
         """Get analytics summary for a specific zone"""
         self.initialize_zone(zone_id)
@@ -110,30 +144,29 @@ class ZoneTracker:
     
     def export_analytics(self, output_path: str):
         """Export analytics data to CSV, Excel and JSON"""
-        if not self.analytics_data:
+        self.close()
+        if not self.event_count:
+            if self.events_path:
+                Path(self.events_path).unlink(missing_ok=True)  # Header only
             print("No analytics data to export")
             return
 
         # Organize outputs into proper folders
-        from pathlib import Path
-        base_name = Path(output_path).stem
-        output_dir = Path(output_path).parent
-
-        # Create organized paths
-        csv_path = str(output_dir / 'analytics' / 'csv' / f'{base_name}.csv')
-        excel_path = str(output_dir / 'analytics' / 'excel' / f'{base_name}.xlsx')
-        json_path = str(output_dir / 'analytics' / 'json' / f'{base_name}.json')
+        csv_path, excel_path, json_path = analytics_paths(output_path)
 
         # Ensure directories exist
         Path(csv_path).parent.mkdir(parents=True, exist_ok=True)
         Path(excel_path).parent.mkdir(parents=True, exist_ok=True)
         Path(json_path).parent.mkdir(parents=True, exist_ok=True)
 
-        # Export detailed events log
-        df = pd.DataFrame(self.analytics_data)
-        
-        # Export to CSV
-        df.to_csv(csv_path, index=False)
+        # Export detailed events log (read back if it was streamed to disk)
+        if self.events_path:
+            df = pd.read_csv(self.events_path)
+            if self.events_path != csv_path:
+                df.to_csv(csv_path, index=False)
+        else:
+            df = pd.DataFrame.from_records(self.analytics_data, columns=self.EVENT_FIELDS)
+            df.to_csv(csv_path, index=False)
         
         # Export to Excel with multiple sheets
         with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
@@ -143,11 +143,8 @@ class ZoneConfigurator:
                 
             color = self._get_zone_color(zone_idx)
             
-            # Draw zone lines
-            for i in range(len(zone)):
-                start_point = zone[i]
-                end_point = zone[(i + 1) % len(zone)]
-                cv2.line(image, start_point, end_point, color, THICKNESS)
+            # Draw zone lines (one call for the whole outline)
+            cv2.polylines(image, [np.array(zone, np.int32)], True, color, THICKNESS)
             
             # Draw zone points
             for point in zone:
@@ -164,9 +161,8 @@ class ZoneConfigurator:
         # Draw current zone being created
         if len(self.current_zone) > 0:
             # Draw current zone lines
-            for i in range(len(self.current_zone) - 1):
-                cv2.line(image, self.current_zone[i], self.current_zone[i + 1], 
-                        CURRENT_COLOR, THICKNESS)
+            cv2.polylines(image, [np.array(self.current_zone, np.int32)], False,
+                          CURRENT_COLOR, THICKNESS)
             
             # Draw preview line to mouse
             if len(self.current_zone) > 0:
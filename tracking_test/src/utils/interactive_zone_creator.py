@@ -127,9 +127,8 @@ class InteractiveZoneCreator:
             current_color = (255, 255, 255)  # White for current zone
             
             # Draw lines between points
-            for i in range(len(self.current_zone) - 1):
-                cv2.line(self.display_frame, self.current_zone[i], 
-                        self.current_zone[i + 1], current_color, self.line_thickness)
+            cv2.polylines(self.display_frame, [np.array(self.current_zone, np.int32)], False,
+                          current_color, self.line_thickness)
             
             # Draw preview line to mouse
             if len(self.current_zone) > 0: